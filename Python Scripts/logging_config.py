@@ -1,25 +1,53 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
 # Create a 'Logs' directory (if one does not already exist)
 log_dir = 'Logs'
 os.makedirs(log_dir, exist_ok = True)
 
+# When enabled, the logger only places records on a queue and a single
+# background listener thread performs the (blocking) file and terminal writes.
+# This keeps the NOAA worker threads from contending on the handler locks.
+queue_logging = True
+
+# Rotate the log file once it reaches 10 MB, retaining the 5 most recent files
+log_max_bytes = 10 * 1024 * 1024
+log_backup_count = 5
+
 # Instantiate logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 formatter = logging.Formatter('%(asctime)s:%(levelname)s:%(message)s')
 
 # instantiate -- file handler
-# create a file handler to write log messages to a file inside the 'logs' directory
+# create a rotating file handler to write log messages to a file inside the 'logs' directory
 log_file = os.path.join(log_dir, 'master_data_pipeline_log.log')
-file_handler = logging.FileHandler(log_file)
+file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes = log_max_bytes, backupCount = log_backup_count)
 file_handler.setFormatter(formatter)
 
 # instantiate -- console handler
 stream_handler = logging.StreamHandler()
 stream_handler.setFormatter(formatter)
 
-# add both handlers to logger
-logger.addHandler(file_handler)
-logger.addHandler(stream_handler)
\ No newline at end of file
+if queue_logging:
+
+    # Producers only enqueue records; the listener drains the queue and
+    # dispatches each record to both handlers from a single thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+
+    queue_listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level = True)
+    queue_listener.start()
+
+    # Flush any remaining records before the interpreter exits
+    atexit.register(queue_listener.stop)
+
+else:
+
+    # add both handlers to logger
+    logger.addHandler(file_handler)
+    logger.addHandler(stream_handler)
@@ -6,7 +6,16 @@ import numpy as np
 
 # Modules for NOAA related classes
 from google.cloud import bigquery
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import concurrent.futures
+import threading
+import hashlib
+import socket
+import uuid
+import time
+import re
 
 
 # Modules for HomeRentalInsurance and CensusMigration related classes
@@ -17,21 +26,262 @@ from bs4 import BeautifulSoup
 # Modules for CensusMigration related class
 import urllib.parse
 import os
+import json
 
 
 
+class NOAAQueryCache:
+
+    def __init__(self, cache_dir = "Query Cache", max_bytes = 5 * 1024 ** 3):
+
+        """
+        Local on-disk cache of query results, stored as Parquet files.
+
+        Each entry is keyed by the normalized SQL text and the last-modified time of
+        every table the query references, so an entry is never served once its source
+        table changes. The modification time of each file doubles as its 'last used'
+        time, and the least recently used entries are evicted once the total size of
+        the cache exceeds 'max_bytes'.
+        """
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.eviction_lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok = True)
+
+    @staticmethod
+    def normalize_query(query):
+
+        # Collapse runs of whitespace and drop any trailing semicolon so that formatting
+        # differences do not produce separate cache entries. Quoted string literals and
+        # identifiers (the odd-numbered parts of the split) are left untouched.
+        parts = re.split(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)""", query)
+        parts = [part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts)]
+        return "".join(parts).strip().rstrip(";").strip()
+
+    def cache_path(self, query, last_modified):
+
+        # Hash the normalized query together with the source tables' last-modified times
+        key_text = f"{self.normalize_query(query)}|{last_modified}"
+        key = hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, query, last_modified):
+
+        # Return the cached result as an Arrow table, or None on a cache miss
+        path = self.cache_path(query, last_modified)
+
+        try:
+            table = pq.read_table(path)
+        except FileNotFoundError:
+            return None
+
+        # Mark the entry as the most recently used (it may have just been evicted by another worker)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        logger.info(f"Query cache hit: {path}")
+        return table
+
+    def put_table(self, query, last_modified, table):
+
+        # Write the Arrow table to a temporary file, then move it into place
+        path = self.cache_path(query, last_modified)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, path)
+
+        self.evict()
+
+    def put_record_batches(self, query, last_modified, record_batches):
+
+        """
+        Pass each Arrow record batch through to the caller while also writing it to the cache.
+
+        The entry is only moved into place once every batch has been consumed, so a partially
+        read result is never cached.
+        """
+
+        path = self.cache_path(query, last_modified)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        writer = None
+        completed = False
+
+        try:
+            for batch in record_batches:
+
+                if writer is None:
+                    writer = pq.ParquetWriter(temp_path, batch.schema)
+
+                writer.write_batch(batch)
+                yield batch
+
+            completed = True
+
+        finally:
+            if writer is not None:
+                writer.close()
+
+                if completed:
+                    os.replace(temp_path, path)
+                else:
+                    os.remove(temp_path)
+
+        if completed and writer is not None:
+            self.evict()
+
+    def evict(self):
+
+        # Remove the least recently used entries until the cache fits within 'max_bytes'
+        with self.eviction_lock:
+
+            entries = []
+
+            for file in os.listdir(self.cache_dir):
+
+                if not file.endswith(".parquet"):
+                    continue
+
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, file))
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, file))
+
+            total_bytes = sum(size for _, size, _ in entries)
+
+            for _, size, file in sorted(entries):
+
+                if total_bytes <= self.max_bytes:
+                    break
+
+                try:
+                    os.remove(os.path.join(self.cache_dir, file))
+                except FileNotFoundError:
+                    pass
+
+                total_bytes -= size
+                logger.info(f"Evicted '{file}' from the query cache.")
+
+
 class NOAABigQueryClient:
 
-    def __init__(self, project_id):
+    def __init__(self, project_id, use_cache = True, cache = None, use_arrow = True):
 
         # Initialize BigQuery client with the given project ID
         self.client = bigquery.Client(project = project_id)
 
+        # Initialize the BigQuery Storage Read API client, used to stream query results as
+        # Arrow record batches. It is only needed (and imported) when the Arrow path is used,
+        # so the DataFrame path does not require the 'google-cloud-bigquery-storage' package.
+        self.bqstorage_client = None
+
+        if use_arrow:
+            from google.cloud import bigquery_storage
+            self.bqstorage_client = bigquery_storage.BigQueryReadClient()
+
+        # Set 'use_cache' to False to bypass the local query-result cache entirely
+        self.use_cache = use_cache
+        self.cache = (cache or NOAAQueryCache()) if use_cache else None
+
+    def source_tables_last_modified(self, query):
+
+        """
+        Look up the last-modified time of every table referenced (following FROM or JOIN) by the query.
+        Table metadata lookups are free and do not consume any scan quota.
+
+        Returns None whenever the freshness of the result cannot be verified, in which case the cache
+        is bypassed (and the query runs as usual):
+
+            - no table reference can be found, or one is a wildcard table (ie. 'storms_*')
+            - a reference cannot be looked up (ie. a CTE name or an INFORMATION_SCHEMA view)
+            - a referenced table is a view (or any other non-'TABLE' type), since its last-modified
+              time does not change when the tables it reads from do
+        """
+
+        # Table references may be quoted as a whole ('`p.d.t`') or part by part ('`p`.`d`.`t`')
+        table_refs = re.findall(r"\b(?:FROM|JOIN)\s+([\w.\-*`]+)", query, flags = re.IGNORECASE)
+        table_refs = sorted({table_ref.replace("`", "") for table_ref in table_refs})
+
+        if not table_refs or any("*" in table_ref for table_ref in table_refs):
+            return None
+
+        try:
+            tables = [self.client.get_table(table_ref) for table_ref in table_refs]
+        except Exception as error:
+            logger.info(f"Bypassing the query cache, as the referenced tables could not be looked up ({error}).")
+            return None
+
+        if any(table.table_type != "TABLE" for table in tables):
+            return None
+
+        return ",".join(table.modified.isoformat() for table in tables)
+
     def execute_query(self, query):
 
+        # Serve the result from the local cache when possible
+        last_modified = self.source_tables_last_modified(query) if self.use_cache else None
+
+        if last_modified is not None:
+            table = self.cache.get(query, last_modified)
+
+            if table is not None:
+                return table.to_pandas()
+
         # Execute the given SQL query and return the result as a DataFrame
         query_job = self.client.query(query)
-        return query_job.to_dataframe()
+        df = query_job.to_dataframe()
+
+        if last_modified is not None:
+            self.cache.put_table(query, last_modified, pa.Table.from_pandas(df, preserve_index = False))
+
+        return df
+
+    def execute_query_arrow(self, query):
+
+        # Serve the result from the local cache when possible
+        last_modified = self.source_tables_last_modified(query) if self.use_cache else None
+
+        if last_modified is not None:
+            table = self.cache.get(query, last_modified)
+
+            if table is not None:
+                return table.to_batches(), table.column_names
+
+        # Execute the given SQL query and return the result as an iterable of
+        # Arrow record batches, read through the BigQuery Storage Read API,
+        # along with the result's column names (known even when no rows are returned)
+        query_job = self.client.query(query)
+        rows = query_job.result()
+        column_names = [field.name for field in rows.schema]
+        record_batches = rows.to_arrow_iterable(bqstorage_client = self.bqstorage_client)
+
+        if last_modified is not None:
+            return self.cache.put_record_batches(query, last_modified, record_batches), column_names
+
+        return record_batches, column_names
+
+    def estimate_table_bytes(self, table_ref, query):
+
+        """
+        Estimate the size (in bytes) of the given table, used to schedule the largest exports first.
+
+        The table's metadata is read first, as it is free. If it does not report a size, the query is
+        dry-run instead, which returns the number of bytes it would process without running it.
+        """
+
+        num_bytes = self.client.get_table(table_ref).num_bytes
+
+        if num_bytes is None:
+            job_config = bigquery.QueryJobConfig(dry_run = True, use_query_cache = False)
+            num_bytes = self.client.query(query, job_config = job_config).total_bytes_processed
+
+        return num_bytes or 0
 
 
 class NOAADataFrameToCSV:
@@ -44,53 +294,833 @@ class NOAADataFrameToCSV:
     def save_to_csv(self, df, table_id):
 
         # Save the DataFrame as a CSV file with the specified table ID
+        # (writing to a temporary file first, which is then moved into place)
         output_file_path = f"{self.noaa_file_path}/{table_id}.csv"
-        df.to_csv(output_file_path, index = False)
-        print(f"CSV file saved to: {output_file_path}")
+        temp_path = f"{output_file_path}.{uuid.uuid4().hex}.tmp"
+
+        try:
+            df.to_csv(temp_path, index = False)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        os.replace(temp_path, output_file_path)
+        logger.info(f"CSV file saved to: {output_file_path}")
+
+    @staticmethod
+    def format_csv_column(column):
+
+        """
+        Format an Arrow column as the text which pandas' 'to_csv' writes for the same column
+        of a 'to_dataframe' result, so that both export paths produce identical CSV files:
+
+            - strings are only quoted when they contain a comma, a quote or a line break
+            - floats are written as Python writes them (ie. '1.0', '1e-05'), and NaN is written
+              as an empty field
+            - booleans are written as 'True' / 'False'
+            - timestamps are written as '2020-01-01 05:00:00+00:00', with the fractional
+              seconds only included when they are non-zero
+
+        Every other type uses Arrow's own string conversion, and nulls are written as empty fields.
+        """
+
+        column_type = column.type
+
+        if pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+            needs_quotes = pc.match_substring_regex(column, r'[",\r\n]')
+            quoted = pc.binary_join_element_wise('"', pc.replace_substring(column, '"', '""'), '"', "")
+            formatted = pc.if_else(needs_quotes, quoted, column)
+
+        elif pa.types.is_floating(column_type):
+            formatted = pc.cast(column, pa.string())
+
+            # Arrow writes '1' where Python writes '1.0'
+            is_whole = pc.invert(pc.match_substring_regex(formatted, "[.eni]"))
+            formatted = pc.if_else(is_whole, pc.binary_join_element_wise(formatted, ".0", ""), formatted)
+
+            # Arrow and Python switch between fixed and scientific notation at different magnitudes
+            # (ie. '0.00001' vs '1e-05'). Such values are rare, so they are formatted one at a time.
+            is_tiny = pc.and_(pc.less(pc.abs(column), 1e-4), pc.not_equal(column, 0))
+            is_huge = pc.greater_equal(pc.abs(column), 1e16)
+            needs_repr = pc.or_(pc.or_(is_tiny, is_huge), pc.match_substring(formatted, "e"))
+
+            if pc.any(needs_repr).as_py():
+                python_repr = pa.array([None if value is None else repr(value) for value in column.to_pylist()], pa.string())
+                formatted = pc.if_else(needs_repr, python_repr, formatted)
+
+            formatted = pc.if_else(pc.is_nan(column), pa.scalar(None, pa.string()), formatted)
+
+        elif pa.types.is_boolean(column_type):
+            formatted = pc.if_else(column, "True", "False")
+
+        elif pa.types.is_timestamp(column_type):
+            whole_seconds = pc.cast(column, pa.timestamp("s", column_type.tz), safe = False)
+            has_fraction = pc.not_equal(pc.cast(whole_seconds, column_type), column)
+            formatted = pc.if_else(has_fraction,
+                                   pc.strftime(column, "%Y-%m-%d %H:%M:%S"),
+                                   pc.strftime(whole_seconds, "%Y-%m-%d %H:%M:%S"))
+
+            # BigQuery TIMESTAMP values are always returned in UTC
+            if column_type.tz is not None:
+                formatted = pc.binary_join_element_wise(formatted, "+00:00", "")
+
+        else:
+            formatted = pc.cast(column, pa.string())
+
+        return pc.fill_null(formatted, "")
+
+    def format_csv_rows(self, columns):
+
+        # Join the formatted columns into CSV lines, then concatenate the lines into a single string.
+        # As in pandas, an empty line is written as '""', since it would otherwise read as no row at all.
+        lines = pc.binary_join_element_wise(*[self.format_csv_column(column) for column in columns], ",")
+        lines = pc.if_else(pc.equal(lines, ""), '""', lines)
+        lines = pc.binary_join_element_wise(lines, "", os.linesep)
+        return pc.binary_join(pa.ListArray.from_arrays(pa.array([0, len(lines)], pa.int32()), lines), "")[0].as_py()
+
+    def save_record_batches_to_csv(self, record_batches, column_names, table_id):
+
+        """
+        Stream the Arrow record batches to a CSV file with the specified table ID.
+        Each batch is written as soon as it arrives, so the full result set is never
+        materialized in memory (nor converted to a DataFrame). The values are formatted
+        exactly as 'save_to_csv' would write them (see 'format_csv_column').
+
+        The batches are written to a temporary file which is only moved into place once
+        the last batch has been written, so a stream which fails part-way never leaves a
+        truncated CSV file behind. If no rows are returned, a header-only CSV file is written.
+        """
+
+        output_file_path = f"{self.noaa_file_path}/{table_id}.csv"
+        temp_path = f"{output_file_path}.{uuid.uuid4().hex}.tmp"
+        completed = False
+
+        try:
+            with open(temp_path, 'w', encoding = 'utf-8', newline = '') as file:
+
+                file.write(self.format_csv_rows([pa.array([column_name], pa.string()) for column_name in column_names]))
+
+                for batch in record_batches:
+                    file.write(self.format_csv_rows(batch.columns))
+
+            completed = True
+
+        finally:
+            if not completed and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        os.replace(temp_path, output_file_path)
+        logger.info(f"CSV file saved to: {output_file_path}")
 
 
 class NOAADataRetrievalOrchestration:
 
-    def __init__(self, project_id, noaa_file_path):
+    def __init__(self, project_id, noaa_file_path, use_arrow = True, use_cache = True):
 
         # Initialize NOAADataRetrieval with NOAABigQueryClient and NOAADataFrameToCSV
-        self.bigquery_client = NOAABigQueryClient(project_id)
+        self.bigquery_client = NOAABigQueryClient(project_id, use_cache, use_arrow = use_arrow)
         self.df_to_csv = NOAADataFrameToCSV(noaa_file_path)
         self.years = range(1950, 2024)
 
+        # When enabled, results are streamed as Arrow record batches directly
+        # to the CSV file, without being converted to a pandas DataFrame
+        self.use_arrow = use_arrow
+
+    def table_ref(self, table_id):
+
+        # Fully qualified reference to the specified table ID
+        return f"bigquery-public-data.noaa_historic_severe_storms.{table_id}"
+
+    def build_query(self, table_id):
+
+        # Build the query which selects every row from the specified table ID
+        return f"SELECT * FROM `{self.table_ref(table_id)}`"
+
+    def estimate_year_sizes(self, years = None):
+
+        # Estimate the size of each year's table (concurrently, since each estimate is a single API call)
+        def estimate(year):
+
+            table_id = f"storms_{year}"
+
+            # A failed estimate only affects the scheduling of that year (the export itself will
+            # surface the error, if it persists), so it falls back to a size of 0
+            try:
+                return self.bigquery_client.estimate_table_bytes(self.table_ref(table_id), self.build_query(table_id))
+            except Exception as error:
+                logger.warning(f"Unable to estimate the size of '{table_id}' ({error}); it will be scheduled last.")
+                return 0
+
+        years = self.years if years is None else years
+
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            return dict(zip(years, executor.map(estimate, years)))
+
+    def years_by_size(self, year_sizes):
+
+        # Order the years from the largest to the smallest estimated table size
+        # (years of equal size, ie. those which could not be estimated, remain in chronological order)
+        return sorted(year_sizes, key = lambda year: year_sizes[year], reverse = True)
+
     def query_bigquery_table(self, table_id):
 
         # Retrieve data from BigQuery for the specified table ID
-        query = f"SELECT * FROM `bigquery-public-data.noaa_historic_severe_storms.{table_id}`"
-        return self.bigquery_client.execute_query(query)
+        return self.bigquery_client.execute_query(self.build_query(table_id))
+
+    def query_bigquery_table_arrow(self, table_id):
+
+        # Retrieve data from BigQuery for the specified table ID as Arrow record batches (and its column names)
+        return self.bigquery_client.execute_query_arrow(self.build_query(table_id))
 
     def export_to_csv(self, year):
 
         # Orchestrate the process of exporting data to CSV for a specific year
         table_id = f"storms_{year}"
-        df = self.query_bigquery_table(table_id)
-        self.df_to_csv.save_to_csv(df, table_id)
+
+        if self.use_arrow:
+            record_batches, column_names = self.query_bigquery_table_arrow(table_id)
+            self.df_to_csv.save_record_batches_to_csv(record_batches, column_names, table_id)
+        else:
+            df = self.query_bigquery_table(table_id)
+            self.df_to_csv.save_to_csv(df, table_id)
+
+
+class NOAASpatialGridIndex:
+
+    def __init__(self, noaa_file_path, cell_size = 1.0):
+
+        """
+        Spatial index which buckets each storm event into a fixed latitude / longitude grid.
+
+        The events are sorted by grid cell, so that all of the events within a given cell
+        occupy one contiguous slice of the index arrays ('cell_offsets' marks where each
+        occupied cell begins). Bounding-box and radius queries therefore only examine the
+        events within the overlapping cells, and per-cell densities are read directly from
+        the offsets without scanning any rows.
+
+        Each indexed event keeps its year and row position within the 'storms_{year}.csv'
+        file, so the full record can be retrieved from the exported data.
+        """
+
+        self.noaa_file_path = noaa_file_path
+        self.cell_size = cell_size
+        self.index_file_path = os.path.join(noaa_file_path, "storms_spatial_grid_index.npz")
+
+        self.n_rows = int(np.ceil(180 / cell_size))
+        self.n_cols = int(np.ceil(360 / cell_size))
+
+    def cell_ids(self, latitudes, longitudes):
+
+        # Map each coordinate to the ID of the grid cell containing it (row-major order)
+        rows = np.clip(np.floor((np.asarray(latitudes) + 90) / self.cell_size).astype(np.int64), 0, self.n_rows - 1)
+        cols = np.clip(np.floor((np.asarray(longitudes) + 180) / self.cell_size).astype(np.int64), 0, self.n_cols - 1)
+        return rows * self.n_cols + cols
+
+    def build(self, years):
+
+        # Read only the coordinate columns from each of the exported CSV files
+        latitudes, longitudes, event_years, event_rows = [], [], [], []
+
+        for year in years:
+
+            file_path = f"{self.noaa_file_path}/storms_{year}.csv"
+
+            if not os.path.exists(file_path):
+                logger.warning(f"'{file_path}' does not exist; storms from {year} will not be indexed.")
+                continue
+
+            df = pd.read_csv(file_path, usecols = ['event_latitude', 'event_longitude'])
+            lat = df['event_latitude'].to_numpy(dtype = float)
+            lon = df['event_longitude'].to_numpy(dtype = float)
+
+            # Events with missing or out of range coordinates cannot be placed on the grid
+            valid = ~np.isnan(lat) & ~np.isnan(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+            row_positions = np.flatnonzero(valid)
+
+            latitudes.append(lat[valid])
+            longitudes.append(lon[valid])
+            event_years.append(np.full(len(row_positions), year, dtype = np.int16))
+            event_rows.append(row_positions)
+
+        self.latitudes = np.concatenate(latitudes) if latitudes else np.empty(0)
+        self.longitudes = np.concatenate(longitudes) if longitudes else np.empty(0)
+        self.years = np.concatenate(event_years) if event_years else np.empty(0, dtype = np.int16)
+        self.rows = np.concatenate(event_rows) if event_rows else np.empty(0, dtype = np.int64)
+
+        # Sort the events by grid cell, and record where each occupied cell begins
+        cells = self.cell_ids(self.latitudes, self.longitudes)
+        order = np.argsort(cells, kind = "stable")
+
+        self.latitudes = self.latitudes[order]
+        self.longitudes = self.longitudes[order]
+        self.years = self.years[order]
+        self.rows = self.rows[order]
+
+        self.occupied_cells, starts = np.unique(cells[order], return_index = True)
+        self.cell_offsets = np.append(starts, len(cells))
+
+        self.save()
+        logger.info(f"Spatial grid index of {len(cells)} storm events across {len(self.occupied_cells)} cells saved to: {self.index_file_path}")
+
+    def save(self):
+
+        # Persist the index alongside the exported CSV files (moving it into place once fully written)
+        temp_path = f"{self.index_file_path}.{uuid.uuid4().hex}.tmp"
+
+        with open(temp_path, 'wb') as file:
+            np.savez(file,
+                     cell_size = self.cell_size,
+                     occupied_cells = self.occupied_cells,
+                     cell_offsets = self.cell_offsets,
+                     latitudes = self.latitudes,
+                     longitudes = self.longitudes,
+                     years = self.years,
+                     rows = self.rows)
+
+        os.replace(temp_path, self.index_file_path)
+
+    def load(self):
+
+        # Load a previously built index from disk
+        with np.load(self.index_file_path) as index:
+
+            self.cell_size = float(index['cell_size'])
+            self.n_rows = int(np.ceil(180 / self.cell_size))
+            self.n_cols = int(np.ceil(360 / self.cell_size))
+
+            self.occupied_cells = index['occupied_cells']
+            self.cell_offsets = index['cell_offsets']
+            self.latitudes = index['latitudes']
+            self.longitudes = index['longitudes']
+            self.years = index['years']
+            self.rows = index['rows']
+
+        return self
+
+    def candidate_positions(self, min_lat, min_lon, max_lat, max_lon):
+
+        # Return the index positions of every event within the grid cells overlapping the box.
+        # Within each grid row, the overlapping cells are contiguous, and so are their events.
+        first_cell = self.cell_ids(min_lat, min_lon)
+        last_cell = self.cell_ids(max_lat, max_lon)
+        first_row, first_col = divmod(int(first_cell), self.n_cols)
+        last_row, last_col = divmod(int(last_cell), self.n_cols)
+
+        slices = []
+
+        for row in range(first_row, last_row + 1):
+
+            lo, hi = np.searchsorted(self.occupied_cells, [row * self.n_cols + first_col, row * self.n_cols + last_col + 1])
+            slices.append(np.arange(self.cell_offsets[lo], self.cell_offsets[hi]))
+
+        return np.concatenate(slices) if slices else np.empty(0, dtype = np.int64)
+
+    def wrapped_candidate_positions(self, min_lat, min_lon, max_lat, max_lon):
+
+        # A box with 'min_lon' greater than 'max_lon' crosses the antimeridian (±180°),
+        # in which case its eastern and western halves are looked up separately
+        if min_lon <= max_lon:
+            return self.candidate_positions(min_lat, min_lon, max_lat, max_lon)
+
+        return np.unique(np.concatenate([self.candidate_positions(min_lat, min_lon, max_lat, 180.0),
+                                         self.candidate_positions(min_lat, -180.0, max_lat, max_lon)]))
+
+    def events_at(self, positions):
+
+        # Return the indexed events at the given positions as a DataFrame
+        return pd.DataFrame({'year': self.years[positions],
+                             'row': self.rows[positions],
+                             'event_latitude': self.latitudes[positions],
+                             'event_longitude': self.longitudes[positions]})
+
+    def bounding_box(self, min_lat, min_lon, max_lat, max_lon):
+
+        # Return the events located within the bounding box. A box with 'min_lon' greater
+        # than 'max_lon' is taken to cross the antimeridian (ie. from 170° to -170°).
+        positions = self.wrapped_candidate_positions(min_lat, min_lon, max_lat, max_lon)
+
+        lat = self.latitudes[positions]
+        lon = self.longitudes[positions]
+
+        if min_lon <= max_lon:
+            inside_lon = (lon >= min_lon) & (lon <= max_lon)
+        else:
+            inside_lon = (lon >= min_lon) | (lon <= max_lon)
+
+        inside = (lat >= min_lat) & (lat <= max_lat) & inside_lon
+
+        return self.events_at(positions[inside])
+
+    def within_radius(self, latitude, longitude, radius_km):
+
+        """
+        Return the events located within 'radius_km' of the given point, along with their distance.
+
+        The candidates are taken from the bounding box enclosing the circle, then filtered
+        using the haversine (great-circle) distance. A circle containing a pole spans every
+        longitude; otherwise its widest longitude extent is asin(sin(d) / cos(latitude)),
+        where d is the angular radius, and a box extending past ±180° wraps around.
+        """
+
+        earth_radius_km = 6371.0
+        angular_radius = radius_km / earth_radius_km
+        lat_delta = np.degrees(angular_radius)
+        min_lat, max_lat = latitude - lat_delta, latitude + lat_delta
+
+        if min_lat <= -90 or max_lat >= 90:
+            min_lat, max_lat = max(-90.0, min_lat), min(90.0, max_lat)
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            lon_delta = np.degrees(np.arcsin(np.sin(angular_radius) / np.cos(np.radians(latitude))))
+            min_lon, max_lon = longitude - lon_delta, longitude + lon_delta
+
+            if min_lon < -180:
+                min_lon += 360
+            if max_lon > 180:
+                max_lon -= 360
+
+        positions = self.wrapped_candidate_positions(min_lat, min_lon, max_lat, max_lon)
+
+        lat = np.radians(self.latitudes[positions])
+        lon = np.radians(self.longitudes[positions])
+        a = np.sin((lat - np.radians(latitude)) / 2) ** 2 \
+            + np.cos(np.radians(latitude)) * np.cos(lat) * np.sin((lon - np.radians(longitude)) / 2) ** 2
+        distance_km = 2 * earth_radius_km * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+        inside = distance_km <= radius_km
+        events = self.events_at(positions[inside])
+        events['distance_km'] = distance_km[inside]
+
+        return events
+
+    def cell_density(self, by_year = False):
+
+        """
+        Return the number of events within each occupied grid cell, identified by its
+        south-west corner. With 'by_year', the counts are broken down by year so that
+        the movement of regional hot spots can be tracked over time.
+        """
+
+        if by_year:
+            cells = np.repeat(self.occupied_cells, np.diff(self.cell_offsets))
+            pairs, counts = np.unique(np.stack([self.years.astype(np.int64), cells]), axis = 1, return_counts = True)
+            years, cells = pairs
+        else:
+            cells = self.occupied_cells
+            counts = np.diff(self.cell_offsets)
+
+        rows, cols = np.divmod(cells, self.n_cols)
+
+        density = pd.DataFrame({'cell_latitude': rows * self.cell_size - 90,
+                                'cell_longitude': cols * self.cell_size - 180,
+                                'event_count': counts})
+
+        if by_year:
+            density.insert(0, 'year', years)
+
+        return density
+
+
+class NOAAWorkQueue:
+
+    def __init__(self, queue_dir, lease_seconds = 900, poll_seconds = 30, max_attempts = 3, retry_delay_seconds = 60):
+
+        """
+        File-based work queue, shared by any number of worker processes (on one or more hosts)
+        through a common filesystem.
+
+        Each work item is a small JSON file ({'year': ..., 'attempts': ...}) which moves between four folders:
+
+            pending/   items waiting to be claimed
+            leased/    items claimed by a worker (the file name is suffixed with '@<worker_id>')
+            done/      items which have been completed
+            failed/    items which failed 'max_attempts' times, and are no longer retried
+
+        Every move is a single (atomic) 'os.rename', so only one worker can ever claim a given item.
+        A lease is held for as long as its file keeps being touched by the worker's heartbeat; once a
+        lease's modification time is older than 'lease_seconds' (ie. the worker crashed), any worker
+        moves the item back to 'pending/' so that it is re-claimed.
+
+        An item whose export fails is returned to 'pending/', but is not claimed again until its retry
+        delay has passed ('retry_delay_seconds', doubling with each attempt).
+
+        Items are processed at least once: a worker which stalls past its lease may still complete an
+        item which was since re-claimed, in which case the export runs twice. Since each CSV file is
+        written to a temporary file and then moved into place, the two exports never write into the
+        same file, and the last one to finish simply replaces the other's (identical) output.
+        """
+
+        self.queue_dir = queue_dir
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+
+        self.registered_dir = os.path.join(queue_dir, "registered")
+        self.pending_dir = os.path.join(queue_dir, "pending")
+        self.leased_dir = os.path.join(queue_dir, "leased")
+        self.done_dir = os.path.join(queue_dir, "done")
+        self.failed_dir = os.path.join(queue_dir, "failed")
+
+        for folder in [self.registered_dir, self.pending_dir, self.leased_dir, self.done_dir, self.failed_dir]:
+            os.makedirs(folder, exist_ok = True)
+
+    def item_names(self, folder):
+
+        # Names of the work items within the folder (stripping any worker ID from leased items)
+        return {file.split("@")[0] for file in os.listdir(folder) if not file.endswith(".tmp")}
+
+    def table_names(self, folder):
+
+        # Names of the tables ('storms_{year}') of the work items within the folder (stripping the position prefix)
+        return {item_name.split("_", 1)[1] for item_name in self.item_names(folder)}
+
+    def write_item(self, path, item):
+
+        # Write the item's JSON to a temporary file, then move it into place
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+        with open(temp_path, 'w') as file:
+            json.dump(item, file)
+
+        os.replace(temp_path, path)
+
+    def populate(self, years):
+
+        """
+        Add a work item for each year which has not already been added. Safe to call from every worker.
+
+        Each year is first registered by creating a marker file with O_EXCL (which only ever succeeds
+        for one worker, and which never moves), so an item is never re-created once another worker
+        has leased or completed it. Should the worker fail before writing the item itself, the year
+        is re-queued by 'requeue_lost_items'.
+
+        Each item name is prefixed with its position in 'years' (ie. '0003_storms_2021'),
+        and since pending items are claimed in name order, they are claimed in that order.
+        """
+
+        for position, year in enumerate(years):
+
+            try:
+                os.close(os.open(os.path.join(self.registered_dir, f"storms_{year}"), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                continue
+
+            self.write_item(os.path.join(self.pending_dir, f"{position:04d}_storms_{year}"), {'year': year, 'attempts': 0})
+
+    def unregistered_years(self, years):
+
+        # The years which have not yet been added to the queue (by any worker)
+        return [year for year in years if not os.path.exists(os.path.join(self.registered_dir, f"storms_{year}"))]
+
+    def reclaim_expired(self):
+
+        # Move every lease which has not been renewed within 'lease_seconds' back to 'pending/'
+        for file in os.listdir(self.leased_dir):
+
+            if file.endswith(".tmp"):
+                continue
+
+            lease_path = os.path.join(self.leased_dir, file)
+
+            try:
+                if time.time() - os.stat(lease_path).st_mtime <= self.lease_seconds:
+                    continue
+
+                os.rename(lease_path, os.path.join(self.pending_dir, file.split("@")[0]))
+
+            except FileNotFoundError:
+                # The item was completed or reclaimed by another worker in the meantime
+                continue
+
+            logger.warning(f"Lease '{file}' expired; '{file.split('@')[0]}' has been returned to the work queue.")
+
+    def lost_tables(self):
+
+        # Registered tables whose work item is in none of the folders
+        return self.item_names(self.registered_dir) - self.table_names(self.pending_dir) - self.table_names(self.leased_dir) \
+               - self.table_names(self.done_dir) - self.table_names(self.failed_dir)
+
+    def requeue_lost_items(self):
+
+        """
+        A year is registered just before its work item is written, so a worker which fails in between
+        leaves a registered year without an item. Once its marker is older than 'lease_seconds', the
+        item is re-created (named so that it is claimed after every other pending item).
+
+        As items move between folders while they are being listed, a year is only treated as lost if
+        it is missing from two consecutive listings. Should an item still be re-created in error, the
+        year is simply exported twice.
+        """
+
+        lost_tables = self.lost_tables()
+
+        if lost_tables:
+            lost_tables &= self.lost_tables()
+
+        for table_name in sorted(lost_tables):
+
+            try:
+                if time.time() - os.stat(os.path.join(self.registered_dir, table_name)).st_mtime <= self.lease_seconds:
+                    continue
+            except FileNotFoundError:
+                continue
+
+            self.write_item(os.path.join(self.pending_dir, f"9999_{table_name}"), {'year': int(table_name.split("_")[1]), 'attempts': 0})
+            logger.warning(f"'{table_name}' was registered without a work item; it has been returned to the work queue.")
+
+    def claim(self, worker_id):
+
+        # Claim the first pending item which is not waiting out a retry delay,
+        # returning (item_name, item, lease_path), or None if there is no such item
+        self.reclaim_expired()
+        self.requeue_lost_items()
+
+        for item_name in sorted(self.item_names(self.pending_dir)):
+
+            pending_path = os.path.join(self.pending_dir, item_name)
+            lease_path = os.path.join(self.leased_dir, f"{item_name}@{worker_id}")
+
+            try:
+                with open(pending_path) as file:
+                    if json.load(file).get('retry_after', 0) > time.time():
+                        continue
+
+                # Refresh the modification time first, since the rename preserves it
+                os.utime(pending_path)
+                os.rename(pending_path, lease_path)
+
+                with open(lease_path) as file:
+                    item = json.load(file)
+
+            except FileNotFoundError:
+                # Another worker claimed this item first
+                continue
+
+            return item_name, item, lease_path
+
+        return None
+
+    def heartbeat(self, lease_path, stop_event):
+
+        # Renew the lease periodically until the work item has been completed
+        while not stop_event.wait(self.lease_seconds / 3):
+
+            try:
+                os.utime(lease_path)
+            except FileNotFoundError:
+                logger.warning(f"Lease '{os.path.basename(lease_path)}' was lost.")
+                return
+
+    def complete(self, item_name, lease_path):
+
+        try:
+            os.rename(lease_path, os.path.join(self.done_dir, item_name))
+        except FileNotFoundError:
+            # The lease expired and the item was re-claimed; the other worker will complete it
+            logger.warning(f"Lease '{os.path.basename(lease_path)}' was lost before '{item_name}' was completed.")
+
+    def release(self, item_name, item, lease_path):
+
+        """
+        Record a failed attempt at the item. Once it has failed 'max_attempts' times, it is moved to
+        'failed/'; otherwise it is returned to 'pending/', to be retried after an exponential backoff.
+        """
+
+        if not os.path.exists(lease_path):
+            # The lease expired and the item was re-claimed by another worker
+            return
+
+        attempts = item.get('attempts', 0) + 1
+
+        if attempts >= self.max_attempts:
+            self.write_item(lease_path, {**item, 'attempts': attempts})
+            destination = os.path.join(self.failed_dir, item_name)
+            logger.error(f"'{item_name}' failed {attempts} times and will not be retried.")
+        else:
+            retry_after = time.time() + self.retry_delay_seconds * 2 ** (attempts - 1)
+            self.write_item(lease_path, {**item, 'attempts': attempts, 'retry_after': retry_after})
+            destination = os.path.join(self.pending_dir, item_name)
+
+        try:
+            os.rename(lease_path, destination)
+        except FileNotFoundError:
+            pass
+
+    def failed_items(self):
+
+        return sorted(self.item_names(self.failed_dir))
+
+    def is_complete(self):
+
+        # Every registered year is either done or failed (items within 'failed/' are not retried)
+        return self.item_names(self.registered_dir) <= self.table_names(self.done_dir) | self.table_names(self.failed_dir)
+
+    def is_finalized(self):
+
+        # Whether a worker has already run the post-export steps (ie. the run is over)
+        return os.path.exists(os.path.join(self.queue_dir, "finalized"))
+
+    def claim_finalization(self):
+
+        # Exactly one worker succeeds in creating the marker file, and runs any post-export steps
+        try:
+            os.close(os.open(os.path.join(self.queue_dir, "finalized"), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+
+        return True
 
 
 class NOAAExecutor:
 
-    def __init__(self, project_id, noaa_file_path):
+    def __init__(self, project_id, noaa_file_path, use_arrow = True, use_cache = True):
+
+        # Initialize NOAA instance with NOAADataRetrievalOrchestration and NOAASpatialGridIndex
+        self.data_retrieval = NOAADataRetrievalOrchestration(project_id, noaa_file_path, use_arrow, use_cache)
+        self.spatial_index = NOAASpatialGridIndex(noaa_file_path)
+
+    def concurrent_export_and_save(self, max_workers = None):
+
+        """
+        The 'storms_{year}' tables range from nearly empty (1950s) to millions of rows (recent years).
+        If the years were submitted chronologically, the run would often end with one of the largest
+        years running on its own. Instead, each year's size is estimated first and the largest years
+        are submitted first: as the thread pool hands out the years in submission order, each idle
+        worker always picks up the largest remaining year (longest-processing-time-first scheduling).
+        """
 
-        # Initialize NOAA instance with NOAADataRetrievalOrchestration
-        self.data_retrieval = NOAADataRetrievalOrchestration(project_id, noaa_file_path)
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        year_sizes = self.data_retrieval.estimate_year_sizes()
+        scheduled_years = self.data_retrieval.years_by_size(year_sizes)
 
-    def concurrent_export_and_save(self):
+        # No schedule can give its busiest worker less than the largest year, nor less than an equal share of the total
+        total_bytes = sum(year_sizes.values())
+        busiest_worker_bytes = max(max(year_sizes.values()), total_bytes / max_workers)
+        logger.info(f"Scheduling {total_bytes / 1024 ** 2:,.0f} MB of NOAA exports largest first across {max_workers} workers "
+                    f"(the busiest worker must export at least {busiest_worker_bytes / 1024 ** 2:,.0f} MB).")
 
         # Enable multithreading
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.map(self.data_retrieval.export_to_csv, self.data_retrieval.years)
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            executor.map(self.data_retrieval.export_to_csv, scheduled_years)
 
         logger.info(f"Retrieval of NOAA Historic Severe Storms data from {self.data_retrieval.years[0]} to {self.data_retrieval.years[-1]} complete.")
 
+    def sharded_export_and_save(self, queue_dir, max_workers = None, **queue_options):
+
+        """
+        Export the NOAA tables through a shared 'NOAAWorkQueue', so that the years are split
+        between every worker process running this method against the same 'queue_dir'
+        (on this machine, or on any host sharing the filesystem).
+
+        Within this process, 'max_workers' threads (defaulting to the ThreadPoolExecutor default)
+        each claim and export one year at a time. Any 'queue_options' (ie. 'lease_seconds') are
+        passed on to the 'NOAAWorkQueue'.
+        Returns True if this process ran the finalization step (all of the years are done or failed),
+        in which case it alone runs the remaining stages of the pipeline.
+        """
+
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        work_queue = NOAAWorkQueue(queue_dir, **queue_options)
+
+        # A finished queue would otherwise be treated as having nothing left to do, and
+        # every worker would exit without exporting anything or running the later stages
+        if work_queue.is_finalized():
+            raise RuntimeError(f"The NOAA work queue at '{queue_dir}' belongs to a run which has already finished. "
+                               f"Set NOAA_WORK_QUEUE_DIR to a new folder to start another run.")
+
+        # Queue the largest years first, so that they are claimed first (see 'concurrent_export_and_save').
+        # The sizes are only estimated when there are years which have yet to be added to the queue.
+        unregistered_years = work_queue.unregistered_years(self.data_retrieval.years)
+
+        if unregistered_years:
+            year_sizes = self.data_retrieval.estimate_year_sizes(unregistered_years)
+            work_queue.populate(self.data_retrieval.years_by_size(year_sizes))
+
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+
+        logger.info(f"Worker '{worker_id}' joining the NOAA work queue at '{queue_dir}'.")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            worker_threads = [executor.submit(self.work_queue_loop, work_queue, f"{worker_id}-{thread_i}")
+                              for thread_i in range(max_workers)]
+
+            for worker_thread in worker_threads:
+                worker_thread.result()
+
+        if work_queue.is_complete() and work_queue.claim_finalization():
+
+            if work_queue.failed_items():
+                logger.error(f"The following NOAA exports failed: {', '.join(work_queue.failed_items())}.")
+
+            logger.info(f"Retrieval of NOAA Historic Severe Storms data from {self.data_retrieval.years[0]} to {self.data_retrieval.years[-1]} complete.")
+            return True
+
+        return False
+
+    def work_queue_loop(self, work_queue, worker_id):
+
+        # Claim and export years until every item is done. While other workers still hold
+        # leases, keep polling so that the items of any crashed worker are re-claimed.
+        while not work_queue.is_complete():
+
+            claimed = work_queue.claim(worker_id)
+
+            if claimed is None:
+                time.sleep(work_queue.poll_seconds)
+                continue
+
+            item_name, item, lease_path = claimed
+            stop_event = threading.Event()
+            heartbeat = threading.Thread(target = work_queue.heartbeat, args = (lease_path, stop_event), daemon = True)
+            heartbeat.start()
+            failed = False
+
+            try:
+                self.data_retrieval.export_to_csv(item['year'])
+            except Exception:
+                logger.exception(f"Worker '{worker_id}' failed to export '{item_name}'.")
+                failed = True
+            finally:
+                stop_event.set()
+                heartbeat.join()
+
+            if failed:
+                work_queue.release(item_name, item, lease_path)
+            else:
+                work_queue.complete(item_name, lease_path)
+
+    def build_spatial_index(self):
+
+        # Bucket the exported storm events into the spatial grid index
+        logger.info(f"Building the spatial grid index of the NOAA Historic Severe Storms events.")
+        self.spatial_index.build(self.data_retrieval.years)
+
+
+# Set NOAA_EXECUTION_MODE to 'sharded' to split the export between every process (on any host)
+# sharing the NOAA_WORK_QUEUE_DIR folder. The spatial index, and the remaining (insurance and
+# census) stages of the pipeline, are then only run by the last worker to finish.
+#
+# NOAA_WORK_QUEUE_DIR has no default: a work queue only covers a single run, so each sharded run
+# must be given a new folder (a finished queue is rejected by 'sharded_export_and_save').
+noaa_execution_mode = os.environ.get("NOAA_EXECUTION_MODE", "threaded")
+noaa_work_queue_dir = os.environ.get("NOAA_WORK_QUEUE_DIR")
+
+if noaa_execution_mode == "sharded" and not noaa_work_queue_dir:
+    raise RuntimeError("NOAA_WORK_QUEUE_DIR must be set to a new (or shared, in-progress) folder when NOAA_EXECUTION_MODE is 'sharded'.")
 
 noaa_instance = NOAAExecutor(project_id, noaa_file_path)
 logger.info(f"Initiating retrieval and storage of data from the NOAA Historic Severe Storms dataset.")
-noaa_instance.concurrent_export_and_save()
+
+if noaa_execution_mode == "sharded":
+    run_remaining_stages = noaa_instance.sharded_export_and_save(noaa_work_queue_dir)
+else:
+    noaa_instance.concurrent_export_and_save()
+    run_remaining_stages = True
+
+if run_remaining_stages:
+    noaa_instance.build_spatial_index()
 
 
 
@@ -224,15 +1254,13 @@ class HomeInsuranceDataDisplayAndSave:
         # Change the settings to display all rows
         pd.set_option("display.max_rows", None)
 
-        print("\n")
         logger.info(f"Initiating retrieval and storage of Homeowners and Renters Insurance by State dataset.")
-        print(f"Displaying the first 10 rows of the dataframe...\n")
-        print(self.df_cleaned.head(10))
+        logger.info(f"Displaying the first 10 rows of the dataframe...\n{self.df_cleaned.head(10)}")
 
         self.df_cleaned.to_csv(self.output_file_path, index = False)
 
         logger.info(f"Retrieval of Homeowners and Renters Insurance by State dataset complete.")
-        print(f"The dataset can be found within the following directory: {self.output_file_path}.")
+        logger.info(f"The dataset can be found within the following directory: {self.output_file_path}.")
 
 
 class HomeRentalInsuranceExecutor:
@@ -286,9 +1314,10 @@ class HomeRentalInsuranceExecutor:
         display_and_save.display_and_save_data()
         
 
-url = "https://www.iii.org/table-archive/21407"
-insurance_instance = HomeRentalInsuranceExecutor(url)
-insurance_instance.run()
+if run_remaining_stages:
+    url = "https://www.iii.org/table-archive/21407"
+    insurance_instance = HomeRentalInsuranceExecutor(url)
+    insurance_instance.run()
 
 
 
@@ -313,7 +1342,6 @@ class CensusDataDownloader:
         # Find all 'a' tags containing links to Excel files
         excel_links = soup.select('a[href$=".xls"]')
 
-        print("\n")
         logger.info(f"Initiating the retrieval and storage of the Census State to State Migration Flows dataset.")
 
         for link in excel_links:
@@ -327,7 +1355,7 @@ class CensusDataDownloader:
             file_url = urllib.parse.urljoin(url, link['href'])
             file_name = os.path.join(self.census_raw_files_folder, os.path.basename(file_url).lower())
 
-            print(f"\nDownloading the '{file_url[file_url.rindex('/') + 1: ]}' file from census.gov")
+            logger.info(f"Downloading the '{file_url[file_url.rindex('/') + 1: ]}' file from census.gov")
 
             # Send a GET request to download the file
             file_response = requests.get(file_url)
@@ -337,7 +1365,7 @@ class CensusDataDownloader:
                 file.write(file_response.content)
 
             last_backslash_index = file_name.rfind('\\')
-            print(f"File saved to the following directory: {file_name[: last_backslash_index]}")
+            logger.info(f"File saved to the following directory: {file_name[: last_backslash_index]}")
 
         logger.info(f"Download of the raw Census State to State Migration Flows data is complete.")
 
@@ -349,6 +1377,9 @@ class CensusDataProcessor:
         self.census_raw_files_folder = census_raw_files_folder
         self.census_cleaned_files_folder = census_cleaned_files_folder
 
+        # Pre-processed dataframes, keyed by year (used to build the 'CensusMigrationTensor')
+        self.yearly_dfs = {}
+
     def process_excel_file(self, file_path):
         
         # Read in the Excel file and convert it to a dataframe.
@@ -417,7 +1448,6 @@ class CensusDataProcessor:
         if not os.path.exists(self.census_cleaned_files_folder):
             os.makedirs(self.census_cleaned_files_folder)
 
-        print("\n")
         logger.info(f"Initiating pre-processing of the raw data files contained with the '{self.census_raw_files_folder}' directory.")
 
         for file in file_list:
@@ -434,17 +1464,124 @@ class CensusDataProcessor:
 
                 # Save the processed DataFrame to the designated folder
                 result_df.to_excel(processed_file_path, index=False)
-                print(f"The data within the '{new_file_name}' file has been pre-processed.")
+                logger.info(f"The data within the '{new_file_name}' file has been pre-processed.")
+
+                # Each file name ends with the year which the data represents
+                year = int(re.findall(r"\d{4}", original_file_name)[-1])
+                self.yearly_dfs[year] = result_df
 
         logger.info(f"All of the pre-processed files have been saved to the '{self.census_cleaned_files_folder}' folder.")
 
 
+class CensusMigrationTensor:
+
+    def __init__(self, tensor_folder):
+
+        """
+        Dense year x origin x destination representation of the State to State Migration Flows.
+
+        The estimates and MOEs are each stored as a NumPy '.npy' file which is memory-mapped
+        from disk, alongside a small JSON file listing the years and states which index the
+        first axis and the origin / destination axes respectively. Pairs for which no flow
+        was reported (including a state to itself) are stored as NaN.
+        """
+
+        self.tensor_folder = tensor_folder
+        self.estimates_path = os.path.join(tensor_folder, "migration_estimates.npy")
+        self.moe_path = os.path.join(tensor_folder, "migration_moe.npy")
+        self.index_path = os.path.join(tensor_folder, "migration_tensor_index.json")
+
+    def build(self, yearly_dfs):
+
+        if not os.path.exists(self.tensor_folder):
+            os.makedirs(self.tensor_folder)
+
+        """
+        The states which index both the origin and destination axes are those listed
+        in the 'Moved To' column, so that the matrix for each year is square. Flows
+        originating from outside of these states (ie. from abroad) are excluded.
+        """
+        self.years = sorted(yearly_dfs)
+        self.states = sorted(set().union(*(df['Moved To: State'].str.strip() for df in yearly_dfs.values())))
+        self.state_index = {state: i for i, state in enumerate(self.states)}
+
+        shape = (len(self.years), len(self.states), len(self.states))
+        self.estimates = np.lib.format.open_memmap(self.estimates_path, mode = 'w+', dtype = np.float32, shape = shape)
+        self.moe = np.lib.format.open_memmap(self.moe_path, mode = 'w+', dtype = np.float32, shape = shape)
+        self.estimates[:] = np.nan
+        self.moe[:] = np.nan
+
+        for year_i, year in enumerate(self.years):
+
+            df = yearly_dfs[year]
+            origins = df['Moved From: State'].str.strip().map(self.state_index)
+            destinations = df['Moved To: State'].str.strip().map(self.state_index)
+            interstate = origins.notna() & destinations.notna()
+
+            origins = origins[interstate].astype(int).to_numpy()
+            destinations = destinations[interstate].astype(int).to_numpy()
+
+            self.estimates[year_i, origins, destinations] = pd.to_numeric(df.loc[interstate, 'Estimate'], errors = 'coerce').to_numpy()
+            self.moe[year_i, origins, destinations] = pd.to_numeric(df.loc[interstate, 'MOE'], errors = 'coerce').to_numpy()
+
+        self.estimates.flush()
+        self.moe.flush()
+
+        with open(self.index_path, 'w') as file:
+            json.dump({'years': self.years, 'states': self.states}, file)
+
+        logger.info(f"Migration tensor of shape {shape} saved to the '{self.tensor_folder}' folder.")
+
+    def load(self):
+
+        # Memory-map the previously built tensor (read-only) from disk
+        with open(self.index_path) as file:
+            index = json.load(file)
+
+        self.years = index['years']
+        self.states = index['states']
+        self.state_index = {state: i for i, state in enumerate(self.states)}
+
+        self.estimates = np.load(self.estimates_path, mmap_mode = 'r')
+        self.moe = np.load(self.moe_path, mmap_mode = 'r')
+
+        return self
+
+    def net_migration(self, year):
+
+        # Total inflow (sum over origins) minus total outflow (sum over destinations), per state
+        flows = self.estimates[self.years.index(year)]
+        inflow = np.nansum(flows, axis = 0)
+        outflow = np.nansum(flows, axis = 1)
+
+        return pd.Series(inflow - outflow, index = self.states, name = 'net_migration')
+
+    def top_inflows(self, state, year, n = 5):
+
+        # The 'n' origin states from which the most people moved to 'state'
+        flows = self.estimates[self.years.index(year), :, self.state_index[state]]
+        return pd.Series(flows, index = self.states, name = 'estimate').dropna().nlargest(n)
+
+    def top_outflows(self, state, year, n = 5):
+
+        # The 'n' destination states to which the most people moved from 'state'
+        flows = self.estimates[self.years.index(year), self.state_index[state], :]
+        return pd.Series(flows, index = self.states, name = 'estimate').dropna().nlargest(n)
+
+    def trend(self, origin, destination):
+
+        # The estimated flow from 'origin' to 'destination' for each year
+        flows = self.estimates[:, self.state_index[origin], self.state_index[destination]]
+        return pd.Series(flows, index = self.years, name = 'estimate')
+
+
 class CensusDataMigration:
     
     def __init__(self):
 
         self.downloader = CensusDataDownloader(census_raw_files_folder)
         self.processor = CensusDataProcessor(census_raw_files_folder, census_cleaned_files_folder)
+        self.tensor = CensusMigrationTensor(os.path.join(census_cleaned_files_folder, "Migration Tensor"))
 
     def download_and_process_data(self, url):
 
@@ -460,11 +1597,16 @@ class CensusDataMigration:
 
                 Each of the dataframes is then converted back to an Excel file which is saved within the
                 'Cleaned Excel Data' folder.
+
+        Step 3. Combine the pre-processed dataframes into a year x origin x destination tensor using the
+                'CensusMigrationTensor' class, which is saved within the 'Migration Tensor' sub-folder.
         """
 
         self.downloader.download_raw_data(url)
         self.processor.process_raw_data()
+        self.tensor.build(self.processor.yearly_dfs)
 
 
-census_migration = CensusDataMigration()
-census_migration.download_and_process_data('https://www.census.gov/data/tables/time-series/demo/geographic-mobility/state-to-state-migration.html')
\ No newline at end of file
+if run_remaining_stages:
+    census_migration = CensusDataMigration()
+    census_migration.download_and_process_data('https://www.census.gov/data/tables/time-series/demo/geographic-mobility/state-to-state-migration.html')
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Loads individual classes from 'master_data_pipeline_oop_script.py' for the tests.
+
+The script runs every stage of the pipeline when it is imported (and requires the local
+'credentials.py' file), so the classes under test are compiled from its source instead,
+along with whichever of its imports are installed.
+"""
+
+import ast
+import logging
+import os
+
+
+SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "..", "Python Scripts", "master_data_pipeline_oop_script.py")
+
+
+def load_classes(*class_names):
+
+    with open(SCRIPT_PATH) as file:
+        tree = ast.parse(file.read())
+
+    namespace = {'logger': logging.getLogger("master_data_pipeline_tests")}
+
+    for node in tree.body:
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            try:
+                exec(compile(ast.Module([node], []), SCRIPT_PATH, "exec"), namespace)
+            except ImportError:
+                # ie. the BigQuery client libraries, which none of the tested classes require
+                continue
+
+        elif isinstance(node, ast.ClassDef) and node.name in class_names:
+            exec(compile(ast.Module([node], []), SCRIPT_PATH, "exec"), namespace)
+
+    return [namespace[class_name] for class_name in class_names]
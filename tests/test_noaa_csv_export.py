@@ -0,0 +1,62 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from pipeline_loader import load_classes
+
+
+NOAADataFrameToCSV, = load_classes("NOAADataFrameToCSV")
+
+
+def storms_table():
+
+    rng = np.random.default_rng(0)
+    floats = np.concatenate([rng.standard_normal(200) * 10.0 ** rng.integers(-12, 20, 200),
+                             [0.0, -0.0, 1.0, np.nan, np.inf, 1e15, 1e16, 1e-4, 9.99e-5]])
+    n = len(floats)
+
+    return pa.table({
+        'state': pa.array(["TEXAS", None, "A, B", 'SAY "HI"', "LINE\nBREAK"] * (n // 5) + ["X"] * (n % 5)),
+        'magnitude': pa.array(floats),
+        'injuries': pa.array([None if i % 7 == 0 else i for i in range(n)], pa.int64()),
+        'flag': pa.array([None if i % 5 == 0 else i % 2 == 0 for i in range(n)]),
+        'event_begin_time': pa.array([None if i % 11 == 0 else datetime.datetime(2020, 1, 1, 5, 0, 0, (i % 3) * 1000) for i in range(n)],
+                                     pa.timestamp("us", "UTC")),
+        'event_date': pa.array([datetime.date(2020, 1, 1) + datetime.timedelta(days = i) for i in range(n)]),
+    })
+
+
+def test_arrow_export_matches_pandas_export(tmp_path):
+
+    # The BigQuery client's 'to_dataframe' maps INTEGER and BOOLEAN columns to nullable pandas dtypes
+    table = storms_table()
+    df = table.to_pandas(types_mapper = {pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype()}.get)
+
+    writer = NOAADataFrameToCSV(str(tmp_path))
+    writer.save_to_csv(df, "storms_pandas")
+    writer.save_record_batches_to_csv(table.to_batches(max_chunksize = 50), table.column_names, "storms_arrow")
+
+    with open(tmp_path / "storms_pandas.csv", newline = "") as pandas_file, open(tmp_path / "storms_arrow.csv", newline = "") as arrow_file:
+        assert arrow_file.read() == pandas_file.read()
+
+
+def test_empty_result_writes_header_only(tmp_path):
+
+    NOAADataFrameToCSV(str(tmp_path)).save_record_batches_to_csv(iter([]), ["state", "event_type"], "storms_empty")
+
+    assert (tmp_path / "storms_empty.csv").read_text() == "state,event_type" + "\n"
+
+
+def test_failed_stream_leaves_no_file(tmp_path):
+
+    def failing_stream():
+        yield pa.record_batch([pa.array([1, 2])], names = ["injuries"])
+        raise RuntimeError("stream interrupted")
+
+    with pytest.raises(RuntimeError):
+        NOAADataFrameToCSV(str(tmp_path)).save_record_batches_to_csv(failing_stream(), ["injuries"], "storms_failed")
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+from pipeline_loader import load_classes
+
+
+NOAAQueryCache, NOAABigQueryClient = load_classes("NOAAQueryCache", "NOAABigQueryClient")
+
+MODIFIED = datetime.datetime(2024, 1, 1, tzinfo = datetime.timezone.utc)
+
+
+class FakeTable:
+
+    def __init__(self, table_type):
+        self.table_type = table_type
+        self.modified = MODIFIED
+
+
+class FakeClient:
+
+    # Knows one table and one view; any other reference raises, as 'get_table' does
+    tables = {"p.d.storms_2020": FakeTable("TABLE"), "p.d.storms_view": FakeTable("VIEW")}
+
+    def __init__(self):
+        self.lookups = []
+
+    def get_table(self, table_ref):
+        self.lookups.append(table_ref)
+        if table_ref not in self.tables:
+            raise ValueError(f"Unknown table '{table_ref}'")
+        return self.tables[table_ref]
+
+
+def client():
+
+    bigquery_client = NOAABigQueryClient.__new__(NOAABigQueryClient)
+    bigquery_client.client = FakeClient()
+    return bigquery_client
+
+
+@pytest.mark.parametrize("query", ["SELECT * FROM `p.d.storms_2020`",
+                                   "SELECT `state` FROM `p.d.storms_2020` AS `s`",
+                                   "select count(*) from `p`.`d`.`storms_2020`",
+                                   "SELECT * FROM p.d.storms_2020 a JOIN `p.d.storms_2020` b USING (event_id)"])
+def test_last_modified_only_looks_up_tables(query):
+
+    bigquery_client = client()
+
+    assert bigquery_client.source_tables_last_modified(query) == MODIFIED.isoformat()
+    assert set(bigquery_client.client.lookups) == {"p.d.storms_2020"}
+
+
+@pytest.mark.parametrize("query", ["SELECT 1",
+                                   "SELECT * FROM `p.d.storms_*`",
+                                   "SELECT * FROM `p.d.INFORMATION_SCHEMA.TABLES`",
+                                   "WITH recent AS (SELECT * FROM `p.d.storms_2020`) SELECT * FROM recent",
+                                   "SELECT * FROM `p.d.storms_view`"])
+def test_cache_is_bypassed_when_freshness_cannot_be_verified(query):
+
+    assert client().source_tables_last_modified(query) is None
+
+
+def test_normalize_query_preserves_quoted_literals():
+
+    assert NOAAQueryCache.normalize_query("SELECT  *\n FROM `t`  ;") == "SELECT * FROM `t`"
+    assert NOAAQueryCache.normalize_query("SELECT * WHERE x = 'a  b'") != NOAAQueryCache.normalize_query("SELECT * WHERE x = 'a b'")
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline_loader import load_classes
+
+
+NOAASpatialGridIndex, = load_classes("NOAASpatialGridIndex")
+
+EARTH_RADIUS_KM = 6371.0
+
+
+@pytest.fixture(scope = "module")
+def storms(tmp_path_factory):
+
+    """
+    Two years of events spread uniformly over the globe (so that the antimeridian and the poles are
+    covered), plus rows with missing or invalid coordinates, which should never be indexed.
+    """
+
+    noaa_file_path = tmp_path_factory.mktemp("noaa")
+    rng = np.random.default_rng(0)
+    frames = {}
+
+    for year in [2020, 2021]:
+
+        n = 20000
+        df = pd.DataFrame({'event_latitude': np.degrees(np.arcsin(rng.uniform(-1, 1, n))),
+                           'event_longitude': rng.uniform(-180, 180, n)})
+        df.loc[::97, 'event_latitude'] = np.nan
+        df.loc[::89, 'event_longitude'] = 999.0
+        df.to_csv(noaa_file_path / f"storms_{year}.csv", index = False)
+
+        df['year'] = year
+        df['row'] = np.arange(n)
+        frames[year] = df
+
+    NOAASpatialGridIndex(str(noaa_file_path)).build([2019, 2020, 2021])
+    index = NOAASpatialGridIndex(str(noaa_file_path)).load()
+
+    events = pd.concat(frames.values())
+    events = events[events['event_latitude'].notna() & (events['event_longitude'].abs() <= 180)]
+
+    return index, events
+
+
+def event_keys(df):
+
+    return set(zip(df['year'], df['row']))
+
+
+def haversine_km(events, latitude, longitude):
+
+    lat = np.radians(events['event_latitude'].to_numpy())
+    lon = np.radians(events['event_longitude'].to_numpy())
+    a = np.sin((lat - np.radians(latitude)) / 2) ** 2 \
+        + np.cos(np.radians(latitude)) * np.cos(lat) * np.sin((lon - np.radians(longitude)) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def radius_cases():
+
+    # Edge cases (antimeridian, poles, very large radii) followed by random queries
+    rng = np.random.default_rng(1)
+    cases = [(0, 179.5, 300), (0, -179.9, 800), (-60, 10, 3000), (51.9, 179.9, 500), (89.5, 45, 200),
+             (-89, -120, 50), (75, 180, 2500), (20, -100, 12000), (0, 0, 20000)]
+    cases += list(zip(rng.uniform(-89, 89, 60), rng.uniform(-180, 180, 60), rng.uniform(10, 5000, 60)))
+    return cases
+
+
+@pytest.mark.parametrize("latitude, longitude, radius_km", radius_cases())
+def test_within_radius_matches_brute_force(storms, latitude, longitude, radius_km):
+
+    index, events = storms
+    expected = events[haversine_km(events, latitude, longitude) <= radius_km]
+
+    assert event_keys(index.within_radius(latitude, longitude, radius_km)) == event_keys(expected)
+
+
+def box_cases():
+
+    rng = np.random.default_rng(2)
+    cases = [(50, 170, 60, -170), (-10, 179, 10, -179), (-90, -180, 90, 180), (30.5, -100.2, 35.3, -90.7)]
+
+    for _ in range(40):
+        min_lat, max_lat = np.sort(rng.uniform(-90, 90, 2))
+        cases.append((min_lat, rng.uniform(-180, 180), max_lat, rng.uniform(-180, 180)))
+
+    return cases
+
+
+@pytest.mark.parametrize("min_lat, min_lon, max_lat, max_lon", box_cases())
+def test_bounding_box_matches_brute_force(storms, min_lat, min_lon, max_lat, max_lon):
+
+    index, events = storms
+    lat, lon = events['event_latitude'], events['event_longitude']
+
+    # A box with min_lon > max_lon crosses the antimeridian
+    inside_lon = lon.between(min_lon, max_lon) if min_lon <= max_lon else (lon >= min_lon) | (lon <= max_lon)
+    expected = events[lat.between(min_lat, max_lat) & inside_lon]
+
+    assert event_keys(index.bounding_box(min_lat, min_lon, max_lat, max_lon)) == event_keys(expected)
+
+
+def test_cell_density_matches_brute_force(storms):
+
+    index, events = storms
+    cell_lat = np.floor(events['event_latitude'].clip(upper = 89.999999)).astype(int)
+    cell_lon = np.floor(events['event_longitude'].clip(upper = 179.999999)).astype(int)
+
+    expected = events.assign(cell_latitude = cell_lat, cell_longitude = cell_lon) \
+                     .groupby(['year', 'cell_latitude', 'cell_longitude']).size()
+
+    density = index.cell_density(by_year = True).set_index(['year', 'cell_latitude', 'cell_longitude'])['event_count']
+
+    assert density.sort_index().to_dict() == expected.sort_index().to_dict()
+    assert index.cell_density()['event_count'].sum() == len(events)
@@ -0,0 +1,206 @@
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from pipeline_loader import load_classes
+
+
+NOAAWorkQueue, NOAAExecutor = load_classes("NOAAWorkQueue", "NOAAExecutor")
+
+FAST_QUEUE_OPTIONS = {'lease_seconds': 0.5, 'poll_seconds': 0.05, 'max_attempts': 3, 'retry_delay_seconds': 0.1}
+
+
+def make_queue(tmp_path, **options):
+
+    return NOAAWorkQueue(str(tmp_path / "queue"), **{**FAST_QUEUE_OPTIONS, **options})
+
+
+def test_populate_is_idempotent_and_items_are_claimed_in_order(tmp_path):
+
+    work_queue = make_queue(tmp_path)
+    work_queue.populate([2021, 1950, 2000])
+    work_queue.populate([1950, 2000, 2021])
+
+    assert work_queue.unregistered_years([1950, 2000, 2021, 2022]) == [2022]
+
+    claimed = [work_queue.claim("worker")[1]['year'] for _ in range(3)]
+
+    assert claimed == [2021, 1950, 2000]
+    assert work_queue.claim("worker") is None
+
+
+def test_each_item_is_claimed_by_exactly_one_worker(tmp_path):
+
+    work_queue = make_queue(tmp_path)
+    work_queue.populate(range(1950, 2000))
+    claims = []
+
+    def claim_all(worker_id):
+        while (claimed := work_queue.claim(worker_id)) is not None:
+            claims.append(claimed[1]['year'])
+
+    workers = [threading.Thread(target = claim_all, args = (f"worker-{i}",)) for i in range(8)]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(claims) == list(range(1950, 2000))
+
+
+def test_expired_lease_is_reclaimed_but_renewed_lease_is_not(tmp_path):
+
+    work_queue = make_queue(tmp_path)
+    work_queue.populate([2020, 2021])
+
+    abandoned = work_queue.claim("crashed-worker")
+    renewed = work_queue.claim("live-worker")
+
+    stop_event = threading.Event()
+    heartbeat = threading.Thread(target = work_queue.heartbeat, args = (renewed[2], stop_event))
+    heartbeat.start()
+
+    time.sleep(work_queue.lease_seconds * 2)
+    reclaimed = work_queue.claim("other-worker")
+
+    stop_event.set()
+    heartbeat.join()
+
+    assert reclaimed[0] == abandoned[0]
+    assert os.path.exists(renewed[2])
+
+    # The crashed worker's late completion is ignored, as the item now belongs to another worker
+    work_queue.complete(abandoned[0], abandoned[2])
+    assert os.path.exists(reclaimed[2])
+
+
+def test_failed_item_backs_off_then_moves_to_failed(tmp_path):
+
+    work_queue = make_queue(tmp_path)
+    work_queue.populate([2020])
+
+    for attempt in range(1, work_queue.max_attempts):
+
+        item_name, item, lease_path = work_queue.claim("worker")
+        work_queue.release(item_name, item, lease_path)
+
+        # Not claimable again until the (doubling) retry delay has passed
+        assert work_queue.claim("worker") is None
+        time.sleep(work_queue.retry_delay_seconds * 2 ** attempt)
+
+    item_name, item, lease_path = work_queue.claim("worker")
+    work_queue.release(item_name, item, lease_path)
+
+    assert work_queue.failed_items() == [item_name]
+    assert json.load(open(os.path.join(work_queue.failed_dir, item_name)))['attempts'] == work_queue.max_attempts
+    assert work_queue.claim("worker") is None
+    assert work_queue.is_complete()
+
+
+def test_registered_year_without_item_is_requeued(tmp_path):
+
+    work_queue = make_queue(tmp_path)
+    work_queue.populate([2020, 2021])
+
+    # Simulate a worker which crashed after registering 2021, but before writing its item
+    os.remove(os.path.join(work_queue.pending_dir, "0001_storms_2021"))
+
+    item_name, _, lease_path = work_queue.claim("worker")
+    work_queue.complete(item_name, lease_path)
+
+    assert not work_queue.is_complete()
+
+    time.sleep(work_queue.lease_seconds * 2)
+    item_name, item, lease_path = work_queue.claim("worker")
+    work_queue.complete(item_name, lease_path)
+
+    assert item['year'] == 2021
+    assert work_queue.is_complete()
+
+
+def test_finalization_is_claimed_once(tmp_path):
+
+    work_queue = make_queue(tmp_path)
+
+    assert not work_queue.is_finalized()
+    assert [work_queue.claim_finalization() for _ in range(3)] == [True, False, False]
+    assert work_queue.is_finalized()
+
+
+class FakeDataRetrieval:
+
+    # Stands in for 'NOAADataRetrievalOrchestration', recording each export as a file
+    years = range(1990, 2010)
+    failing_year = 2005
+
+    def __init__(self, output_dir, crash_year = None):
+        self.output_dir = output_dir
+        self.crash_year = crash_year
+
+    def estimate_year_sizes(self, years = None):
+        return {year: year for year in (self.years if years is None else years)}
+
+    def years_by_size(self, year_sizes):
+        return sorted(year_sizes, key = lambda year: year_sizes[year], reverse = True)
+
+    def export_to_csv(self, year):
+
+        if year == self.crash_year:
+            os._exit(1)
+
+        if year == self.failing_year:
+            raise RuntimeError("export failed")
+
+        time.sleep(0.02)
+
+        with open(os.path.join(self.output_dir, f"{year}.{os.getpid()}"), 'w'):
+            pass
+
+
+def run_worker(queue_dir, output_dir, crash_year):
+
+    # Each worker process exits with 0 if it ran the finalization step, and 3 otherwise
+    executor = NOAAExecutor.__new__(NOAAExecutor)
+    executor.data_retrieval = FakeDataRetrieval(output_dir, crash_year)
+
+    finalized = executor.sharded_export_and_save(queue_dir, 2, **FAST_QUEUE_OPTIONS)
+    sys.exit(0 if finalized else 3)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason = "relies on forked worker processes")
+def test_sharded_run_survives_crashes_and_failures(tmp_path):
+
+    queue_dir, output_dir = str(tmp_path / "queue"), str(tmp_path / "out")
+    os.makedirs(output_dir)
+    context = multiprocessing.get_context("fork")
+
+    # The first worker crashes while holding leases, then three workers run the queue to completion
+    crashed = context.Process(target = run_worker, args = (queue_dir, output_dir, 2007))
+    crashed.start()
+    crashed.join()
+
+    workers = [context.Process(target = run_worker, args = (queue_dir, output_dir, None)) for _ in range(3)]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout = 60)
+
+    work_queue = NOAAWorkQueue(queue_dir)
+    exported_years = {int(file.split(".")[0]) for file in os.listdir(output_dir)}
+
+    assert crashed.exitcode == 1
+    assert sorted(worker.exitcode for worker in workers) == [0, 3, 3]
+    assert exported_years == set(FakeDataRetrieval.years) - {FakeDataRetrieval.failing_year}
+    assert work_queue.failed_items() == [f"0004_storms_{FakeDataRetrieval.failing_year}"]
+    assert work_queue.is_complete() and work_queue.is_finalized()
+
+    # A later run against the same (finished) queue is rejected rather than silently doing nothing
+    with pytest.raises(RuntimeError):
+        run_worker(queue_dir, output_dir, None)